@@ -2,8 +2,10 @@
 
 import os
 from datetime import date
-from sqlalchemy import create_engine, Column, Integer, String, Date
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, Column, Integer, String, Date, Index, text, select, bindparam, lambda_stmt, inspect
+from sqlalchemy.orm import sessionmaker, scoped_session, configure_mappers
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.ext.declarative import declarative_base
 from werkzeug.security import generate_password_hash, check_password_hash # For password hashing
 
@@ -17,9 +19,32 @@ if not DATABASE_URL:
     else:
         raise ValueError("FATAL: DATABASE_URL environment variable is not configured for production.")
 
-engine = create_engine(DATABASE_URL)
+# Connection pool tuning (overridable per deployment via environment variables)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+
+if DATABASE_URL.startswith("sqlite"):
+    # SQLite dev fallback: a single shared connection usable across request threads
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+else:
+    # pool_pre_ping discards connections the server dropped instead of failing the request
+    engine = create_engine(
+        DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
 Base = declarative_base()
-Session = sessionmaker(bind=engine)
+# Thread-local session registry; the web app removes the session at the end of each request
+Session = scoped_session(sessionmaker(bind=engine, expire_on_commit=False, autoflush=False))
 
 # --- 2. Database Model (MM-100 Schema) ---
 class CampaignMember(Base):
@@ -47,10 +72,31 @@ class CampaignMember(Base):
     # Audit Field (MM-102)
     last_modified = Column(Date, default=date.today)
 
+    # Verification payload encoded in the card's QR code (IDG-300), written with the row.
+    # Rows created before this column existed hold NULL and are computed on demand.
+    qr_payload = Column(String(128))
+
+    # Indexes for search filters (MM-104) and the regional report (GM-202).
+    # user_id and nrc are already indexed by their unique constraints.
+    __table_args__ = (
+        Index('ix_member_province_status_id', 'province', 'status', 'id'),
+        Index('ix_member_status', 'status'),
+    )
+
     def __repr__(self):
         return f"<CampaignMember(user_id='{self.user_id}', name='{self.name}', status='{self.status}')>"
 
+def member_qr_payload(user_id, status, membership_end):
+    """Returns the verification payload encoded in a member's QR code.
+
+    Any write that changes user_id, status or membership_end must store the new value in qr_payload.
+    """
+    return f"PCT-VERIFY:{user_id}|STATUS:{status}|EXPIRY:{membership_end.isoformat()}"
+
 # --- Admin User Model (SEC-400) ---
+# Explicit scrypt parameters (N=2^15, r=8, p=1) so the per-login cost doesn't drift with Werkzeug's defaults
+PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+
 class AdminUser(Base):
     __tablename__ = 'admin_users'
     
@@ -60,28 +106,83 @@ class AdminUser(Base):
     role = Column(String, default='DataEntry') # Roles: SuperAdmin, ProvincialAdmin, DataEntry
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def needs_rehash(self):
+        """True if the stored hash was not created with the current PASSWORD_HASH_METHOD."""
+        return not self.password_hash.startswith(f"{PASSWORD_HASH_METHOD}$")
+
+
+# Configure the mappers now, at import, rather than inside whichever request first touches a model
+configure_mappers()
+
+# --- Hot-path Lookup Statements ---
+# lambda_stmt caches the compiled SQL on first use, so per-request lookups skip statement compilation.
+# Execute with the bind value, e.g. session.execute(MEMBER_BY_USER_ID, {"user_id": ...}).
+MEMBER_BY_USER_ID = lambda_stmt(
+    lambda: select(CampaignMember).where(CampaignMember.user_id == bindparam('user_id'))
+)
+VERIFICATION_BY_USER_ID = lambda_stmt(
+    lambda: select(
+        CampaignMember.user_id,
+        CampaignMember.name,
+        CampaignMember.status,
+        CampaignMember.membership_end
+    ).where(CampaignMember.user_id == bindparam('user_id'))
+)
+ADMIN_BY_USERNAME = lambda_stmt(
+    lambda: select(AdminUser).where(AdminUser.username == bindparam('username'))
+)
+
 
 # --- 3. Database Initialization Function ---
 def create_db_tables():
     """Creates the necessary tables in the database (CampaignMember and AdminUser)."""
     print("Attempting to create database tables...")
     Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        # create_all skips tables that already exist, so add columns introduced since the first deployment
+        member_columns = {column['name'] for column in inspect(conn).get_columns('campaign_members')}
+        if 'qr_payload' not in member_columns:
+            conn.execute(text("ALTER TABLE campaign_members ADD COLUMN qr_payload VARCHAR(128)"))
+
+        # create_all skips tables that already exist, so add any indexes missing from older deployments
+        for index in CampaignMember.__table__.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+        # Indexes from earlier deployments that no query reads (search goes through search_tsv
+        # on PostgreSQL); each one only added cost to every insert
+        for index_name in ('ix_member_name_lower', 'ix_member_name_trgm', 'ix_member_nrc_trgm', 'ix_member_town_trgm'):
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+        if engine.dialect.name == 'postgresql':
+            # Full-text search vector over name, NRC and town, maintained by PostgreSQL (MM-104).
+            # Not mapped on CampaignMember so the model stays portable to the SQLite dev database.
+            conn.execute(text(
+                "ALTER TABLE campaign_members ADD COLUMN IF NOT EXISTS search_tsv tsvector "
+                "GENERATED ALWAYS AS (to_tsvector('simple', "
+                "coalesce(name, '') || ' ' || coalesce(nrc, '') || ' ' || coalesce(town, ''))) STORED"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_member_search_tsv "
+                "ON campaign_members USING gin (search_tsv)"
+            ))
     print("Database tables created successfully or already exist.")
 
     # --- Initial User Setup (SEC-400: SuperAdmin Creation) ---
     session = Session()
-    if session.query(AdminUser).filter_by(username='superadmin').first() is None:
+    if session.execute(ADMIN_BY_USERNAME, {"username": 'superadmin'}).scalar_one_or_none() is None:
         initial_admin = AdminUser(username='superadmin', role='SuperAdmin')
         initial_admin.set_password('PCT_InitialSecure2025') # **CHANGE THIS PASSWORD IMMEDIATELY**
         session.add(initial_admin)
         session.commit()
         print("Created default SuperAdmin user: 'superadmin'.")
-    session.close()
+    # Discard the thread's scoped session, not just close it, so later callers start fresh
+    Session.remove()
 
 if __name__ == '__main__':
     # This is for manual execution on the Render Shell
@@ -2,43 +2,205 @@
 
 import os
 import uuid
+import csv
+import string
+from collections import namedtuple
+import re
+import hashlib
+import gzip
+import threading
+import time
 from datetime import date
-from io import BytesIO
+from io import BytesIO, TextIOWrapper
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-from reportlab.graphics.barcode import qr
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics import renderPDF
+from reportlab.pdfbase import pdfmetrics
+from reportlab.graphics.barcode import qrencoder
 from reportlab.lib.utils import ImageReader # For handling images in ReportLab
 from reportlab.lib import colors # For defining custom colors
+from PIL import Image, ImageOps, UnidentifiedImageError
 from flask import Flask, jsonify, request, send_file
+from flask.json.provider import JSONProvider
+import orjson
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.security import generate_password_hash, check_password_hash
 from flask_cors import CORS 
-from functools import wraps
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from functools import wraps, lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import func
 from sqlalchemy import or_ 
-from sqlalchemy.exc import OperationalError # Import to catch connection issues
+from sqlalchemy import text
+from sqlalchemy import select
+from sqlalchemy import false
+from cachetools import TTLCache, cached
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError, IntegrityError # Import to catch connection issues
 
 # Import Database Logic
-from db import Session, CampaignMember, AdminUser, create_db_tables
+from db import Session, CampaignMember, create_db_tables, PASSWORD_HASH_METHOD
+from db import MEMBER_BY_USER_ID, VERIFICATION_BY_USER_ID, ADMIN_BY_USERNAME, member_qr_payload
 
 # --- 1. APPLICATION SETUP & CONFIGURATION ---
+class ORJSONProvider(JSONProvider):
+    """Serves jsonify() and request.json through orjson, which also writes dates as YYYY-MM-DD."""
+
+    # Like the stdlib encoder, write non-string dict keys (e.g. a NULL province in reports) as strings
+    OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round trip in dumps()
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.OPTIONS), mimetype='application/json')
+
 app = Flask(__name__)
-CORS(app) # Initialize CORS to allow cross-origin requests
+app.json = ORJSONProvider(app)
+
+# CORS only on the API routes: the public verification lookup is open to any origin, while the
+# admin dashboard's origins can be pinned with ADMIN_ORIGINS (comma-separated, defaults to any).
+# Browsers cache the preflight for a day, so repeat calls skip the extra OPTIONS round trip.
+ADMIN_ORIGINS = [origin.strip() for origin in os.environ.get("ADMIN_ORIGINS", "*").split(",") if origin.strip()]
+CORS(app, resources={
+    r"/verify/*": {"origins": "*"},
+    r"/admin/*": {"origins": ADMIN_ORIGINS},
+    r"/members/*": {"origins": ADMIN_ORIGINS},
+    r"/": {"origins": ADMIN_ORIGINS},
+}, max_age=86400)
+
+# Shared pool for blocking disk I/O and PDF rendering, kept off the request thread
+EXECUTOR = ThreadPoolExecutor(max_workers=8)
+
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    """Returns the request's database session to the pool once the response is built."""
+    Session.remove()
+
+# Gzip text responses (search results, reports) for clients that accept it. PDFs and images are
+# already compressed, so only these types are touched, and small bodies are not worth the CPU.
+COMPRESS_MIMETYPES = {'application/json', 'text/html', 'text/csv'}
+COMPRESS_MIN_SIZE = 500
+COMPRESS_LEVEL = 6
+
+@app.after_request
+def compress_response(response):
+    """Gzips eligible buffered responses when the client sends Accept-Encoding: gzip."""
+    if (response.mimetype not in COMPRESS_MIMETYPES
+            or response.is_streamed
+            or response.direct_passthrough
+            or response.status_code < 200
+            or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip']:
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(body, compresslevel=COMPRESS_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 # Configuration for secure file handling
 UPLOAD_DIR = "/tmp/photos"
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
 
+# Pre-rendered QR code images, shared by all workers on the host (IDG-300)
+QR_DIR = "/tmp/qr"
+if not os.path.exists(QR_DIR):
+    os.makedirs(QR_DIR)
+
+# Rendered card PDFs from background jobs, named by card ETag so any worker can serve them (IDG-300)
+CARD_DIR = "/tmp/cards"
+if not os.path.exists(CARD_DIR):
+    os.makedirs(CARD_DIR)
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+ALLOWED_PHOTO_MIMETYPES = {'image/png', 'image/jpeg'}
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Photos are stored at card resolution (the 80pt photo box), not as uploaded from a phone camera
+PHOTO_MAX_PIXELS = 200
+PHOTO_JPEG_QUALITY = 75
+
+# Reject oversized request bodies up front; Werkzeug enforces this while the body is read
+app.config['MAX_CONTENT_LENGTH'] = 8 * 1024 * 1024
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    """Returns JSON instead of the default HTML page when an upload exceeds MAX_CONTENT_LENGTH."""
+    return jsonify({"error": "Upload too large. The limit is 8 MB."}), 413
+
+# Short-lived, per-process cache for read-mostly lookups (SEC-401)
+VERIFY_CACHE = TTLCache(maxsize=10000, ttl=60)   # user_id -> verification fields
+CACHE_LOCK = threading.Lock()
+
+def cached_lookup(cache, key, load):
+    """Returns cache[key], calling load() and caching its result on a miss. None results are not cached."""
+    with CACHE_LOCK:
+        value = cache.get(key)
+    if value is None:
+        value = load()
+        if value is not None:
+            with CACHE_LOCK:
+                cache[key] = value
+    return value
 
 def allowed_file(filename):
     """Checks for allowed file extensions."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def save_card_photo(source, filepath):
+    """Shrinks an uploaded photo (a path or file object) to card size and writes it to filepath as JPEG.
+
+    Raises UnidentifiedImageError if the upload is not a readable image, and
+    Image.DecompressionBombError if its pixel dimensions are implausibly large.
+    """
+    with Image.open(source) as original:
+        # Let JPEGs decode at a reduced scale (still at least the target size) instead of full resolution
+        original.draft('RGB', (PHOTO_MAX_PIXELS, PHOTO_MAX_PIXELS))
+        # Apply the camera's EXIF orientation before the tag is dropped by the re-encode
+        img = ImageOps.exif_transpose(original).convert('RGB')
+    img.thumbnail((PHOTO_MAX_PIXELS, PHOTO_MAX_PIXELS), Image.LANCZOS)
+
+    # Write then rename so a card render never reads a partially written photo
+    tmp_path = f"{filepath}.{uuid.uuid4().hex}.tmp"
+    img.save(tmp_path, 'JPEG', quality=PHOTO_JPEG_QUALITY, optimize=True)
+    os.replace(tmp_path, filepath)
+
 # --- 2. SECURITY DECORATOR (SEC-400) ---
+# Signing key for admin bearer tokens
+SECRET_KEY = os.environ.get("SECRET_KEY")
+if not SECRET_KEY:
+    # Use a fixed key for local testing only, otherwise raise error
+    if os.environ.get("FLASK_ENV") == "development":
+        SECRET_KEY = "pct-mcs-local-development-key"
+    else:
+        raise ValueError("FATAL: SECRET_KEY environment variable is not configured for production.")
+
+ADMIN_TOKEN_MAX_AGE = 8 * 60 * 60 # Seconds before an admin must log in again
+TOKEN_SERIALIZER = URLSafeTimedSerializer(SECRET_KEY, salt="pct-mcs-admin-token")
+
+# The admin identity handed to protected routes, decoded from the signed token
+AuthenticatedAdmin = namedtuple('AuthenticatedAdmin', ['username', 'role'])
+
+def issue_admin_token(user):
+    """Returns a signed, timestamped bearer token carrying the admin's username and role."""
+    return TOKEN_SERIALIZER.dumps({"sub": user.username, "role": user.role})
+
 def role_required(required_roles):
     """Decorator to check for user authentication and required roles."""
     def decorator(f):
@@ -46,39 +208,56 @@ def role_required(required_roles):
         def decorated_function(*args, **kwargs):
             auth_header = request.headers.get('Authorization')
             if not auth_header or not auth_header.startswith('Bearer '):
-                return jsonify({"error": "Authorization token is missing or invalid."}, 401)
+                return jsonify({"error": "Authorization token is missing or invalid."}), 401
             
+            # Verifying the signature is enough to trust the claims, so no database lookup is needed
             auth_token = auth_header.split(' ')[1]
-            session = Session()
-            user = session.query(AdminUser).filter_by(username=auth_token).first()
-            session.close()
+            try:
+                claims = TOKEN_SERIALIZER.loads(auth_token, max_age=ADMIN_TOKEN_MAX_AGE)
+            except SignatureExpired:
+                return jsonify({"error": "Session expired. Please log in again."}), 401
+            except BadSignature:
+                return jsonify({"error": "User not authenticated."}), 401
 
-            if user is None:
-                return jsonify({"error": "User not authenticated."}, 401)
+            user = AuthenticatedAdmin(claims["sub"], claims["role"])
             
             if user.role not in required_roles:
-                return jsonify({"error": f"Access Forbidden. Role '{user.role}' cannot access this resource."}, 403)
+                return jsonify({"error": f"Access Forbidden. Role '{user.role}' cannot access this resource."}), 403
             
-            # Pass the authenticated user object to the route function
+            # Pass the authenticated admin to the route function
             return f(user, *args, **kwargs)
         return decorated_function
     return decorator
 
 # --- 3. CORE ENDPOINTS ---
 
+@cached(TTLCache(maxsize=1, ttl=30), lock=threading.Lock())
+def approximate_member_count():
+    """Returns the member count for the status page, refreshed at most every 30 seconds."""
+    session = Session()
+    if session.bind.dialect.name == 'postgresql':
+        # Planner estimate from the catalog: constant time, unlike COUNT(*) which scans the heap
+        estimate = session.execute(text(
+            "SELECT reltuples::bigint FROM pg_class WHERE relname = 'campaign_members'"
+        )).scalar()
+        # reltuples is -1 (or 0 on older servers) until the table has been vacuumed/analyzed
+        if estimate and estimate > 0:
+            return estimate
+    return session.execute(select(func.count()).select_from(CampaignMember)).scalar_one()
+
 @app.route('/')
 def home():
     """Confirms the web service is running and checks DB connectivity."""
-    session = Session()
     try:
-        # Perform a quick query to test database connectivity
-        member_count = session.query(CampaignMember).count()
+        # Liveness probe: constant time no matter how large the tables grow
+        Session().execute(text("SELECT 1")).scalar()
+        member_count = approximate_member_count()
         
         return jsonify({
             "status": "online",
             "system": "Presidential Campaign Team System (PCT-MCS)",
             "message": "API and Database connection are active.",
-            "active_members_in_db": member_count
+            "approximate_members_in_db": member_count
         })
     
     except OperationalError as e:
@@ -88,24 +267,34 @@ def home():
             "message": "Database Operational Error: Cannot connect or tables not created.",
             "troubleshoot": "Ensure DATABASE_URL is correct and run the database initialization script."
         }), 500
-    
-    finally:
-        session.close()
 
 # --- Admin Login Endpoint (SEC-400) ---
+# Verified against when the username is unknown, so failed logins take the same time either way
+_DUMMY_PASSWORD_HASH = generate_password_hash(uuid.uuid4().hex, method=PASSWORD_HASH_METHOD)
+
 @app.route('/admin/login', methods=['POST'])
 def admin_login():
-    """Authenticates admin and returns their username as a token."""
+    """Authenticates admin and returns a signed bearer token."""
     data = request.json
     session = Session()
     try:
-        user = session.query(AdminUser).filter_by(username=data.get('username')).first()
+        user = session.execute(ADMIN_BY_USERNAME, {"username": data.get('username')}).scalar_one_or_none()
+        password = data.get('password') or ''
         
-        if user and user.check_password(data.get('password')):
+        # Password hashing is deliberately CPU-heavy, so it runs on the shared pool
+        if user is None:
+            EXECUTOR.submit(check_password_hash, _DUMMY_PASSWORD_HASH, password).result()
+        elif EXECUTOR.submit(user.check_password, password).result():
+            # Upgrade hashes created with older parameters now that the plaintext is known
+            if user.needs_rehash():
+                user.set_password(password)
+                session.commit()
+
             return jsonify({
-                "message": "Login successful. Use your username as the Bearer Token.",
+                "message": "Login successful. Use the returned token as the Bearer Token.",
                 "role": user.role,
-                "token_for_testing": user.username # For testing admin routes
+                "token": issue_admin_token(user),
+                "expires_in": ADMIN_TOKEN_MAX_AGE
             }), 200
         
         # FIX: Ensure all failure cases return JSON, not the default HTML error page
@@ -116,12 +305,23 @@ def admin_login():
         return jsonify({
             "error": "Database error during login. Check server logs.",
         }), 500
-    
-    finally:
-        session.close()
 
 
 # --- FEATURE MM-100 & MM-101: SECURE MEMBER REGISTRATION ---
+ULID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ" # Crockford base32
+
+def new_ulid():
+    """Returns a 26-character ULID: a 48-bit millisecond timestamp followed by 80 random bits.
+
+    ULIDs sort by creation time, so new user_ids append to the right edge of the unique index.
+    """
+    value = (int(time.time() * 1000) << 80) | int.from_bytes(os.urandom(10), 'big')
+    chars = []
+    for _ in range(26):
+        value, remainder = divmod(value, 32)
+        chars.append(ULID_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
 @app.route('/members/register', methods=['POST'])
 @role_required(['SuperAdmin', 'ProvincialAdmin', 'DataEntry'])
 def register_member(admin_user):
@@ -135,44 +335,74 @@ def register_member(admin_user):
         nrc = data.get('nrc')
         if not nrc or not photo_file:
             return jsonify({"error": "Missing required data (NRC or Photo ID)."}, 400)
-            
-        if session.query(CampaignMember).filter_by(nrc=nrc).first():
-            return jsonify({"error": "NRC already exists. Cannot create duplicate member."}, 409)
 
         if not allowed_file(photo_file.filename):
             return jsonify({"error": "Invalid photo file type. Must be PNG, JPG, or JPEG."}, 400)
 
+        # Reject malformed dates before any photo I/O or database write
+        try:
+            membership_end = date.fromisoformat(data.get('membership_end_date', '2028-12-31'))
+        except ValueError:
+            return jsonify({"error": "Invalid membership_end_date. Use YYYY-MM-DD."}), 400
+
         # 2. Secure File Handling (SEC-404)
-        unique_id = f"PCT-{date.today().year}-{uuid.uuid4().hex[:6].upper()}"
+        today = date.today()
+        unique_id = f"PCT-{today.year}-{new_ulid()}"
         filename = secure_filename(f"{unique_id}_photo.jpg")
         
         filepath = os.path.join(UPLOAD_DIR, filename)
-        photo_file.save(filepath)
+        qr_payload = member_qr_payload(unique_id, 'Active', membership_end)
         
         # 3. Save to Database (MM-100)
-        end_date_str = data.get('membership_end_date', '2028-12-31')
-        
-        new_member = CampaignMember(
+        # Single INSERT ... ON CONFLICT (nrc) DO NOTHING: the unique constraint does the duplicate
+        # check atomically, so two concurrent registrations of one NRC cannot both succeed (MM-101)
+        insert = pg_insert if session.bind.dialect.name == 'postgresql' else sqlite_insert
+        stmt = insert(CampaignMember).values(
             user_id=unique_id,
             name=data.get('name', 'N/A'),
             nrc=nrc,
             province=data.get('province', 'Unknown'),
             town=data.get('town', 'N/A'),
             zone=data.get('zone', 'N/A'),
-            membership_start=date.today(),
-            membership_end=date.fromisoformat(end_date_str),
+            membership_start=today,
+            membership_end=membership_end,
             status='Active',
             photo_filename=filename, # SEC-402: Storing reference, not the image itself
-            last_modified=date.today()
-        )
-        session.add(new_member)
+            last_modified=today,
+            qr_payload=qr_payload
+        ).on_conflict_do_nothing(index_elements=['nrc']).returning(CampaignMember.user_id)
+
+        if session.execute(stmt).scalar_one_or_none() is None:
+            session.rollback()
+            return jsonify({"error": "NRC already exists. Cannot create duplicate member."}), 409
+
+        # Write the photo only once the row is accepted; a failed write rolls the insert back
+        EXECUTOR.submit(save_card_photo, photo_file.stream, filepath).result(timeout=30)
         session.commit()
+
+        # Render the card's QR code now so the first card request only has to embed it
+        try:
+            qr_image_path(qr_payload)
+        except Exception as e:
+            print(f"QR Pre-render Error: {e}")
         
         return jsonify({
             "message": "Campaign Member registered successfully.",
             "user_id": unique_id
         }), 201
 
+    except RequestEntityTooLarge as e:
+        session.rollback()
+        return request_too_large(e)
+
+    except UnidentifiedImageError:
+        session.rollback()
+        return jsonify({"error": "Invalid photo. The upload is not a readable PNG or JPEG image."}), 400
+
+    except Image.DecompressionBombError:
+        session.rollback()
+        return jsonify({"error": "Invalid photo. The image dimensions are too large."}), 400
+
     except OperationalError as e:
         session.rollback()
         print(f"Registration DB Operational Error: {e}")
@@ -182,36 +412,299 @@ def register_member(admin_user):
         session.rollback()
         print(f"Registration Error: {e}")
         return jsonify({"error": f"Internal Server Error: {str(e)}"}, 500)
+
+# --- STREAMED PHOTO UPLOAD (SEC-404) ---
+@app.route('/members/<string:user_id>/photo', methods=['PUT'])
+@role_required(['SuperAdmin', 'ProvincialAdmin', 'DataEntry'])
+def upload_member_photo(admin_user, user_id):
+    """Stores a member's ID photo sent as the raw request body (Content-Type image/jpeg or image/png).
+
+    The body is copied to disk in fixed-size chunks, so memory use does not grow with the file size.
+    """
+    session = Session()
+    tmp_path = None
+    try:
+        if request.mimetype not in ALLOWED_PHOTO_MIMETYPES:
+            return jsonify({"error": "Invalid photo content type. Must be image/jpeg or image/png."}), 415
+
+        member = session.execute(MEMBER_BY_USER_ID, {"user_id": user_id}).scalar_one_or_none()
+        if not member:
+            return jsonify({"error": "Member not found."}), 404
+
+        filename = secure_filename(f"{member.user_id}_photo.jpg")
+        filepath = os.path.join(UPLOAD_DIR, filename)
+        tmp_path = f"{filepath}.{uuid.uuid4().hex}.tmp"
+
+        with open(tmp_path, 'wb') as out:
+            while True:
+                chunk = request.stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                out.write(chunk)
+
+        if os.path.getsize(tmp_path) == 0:
+            return jsonify({"error": "Missing photo data in request body."}), 400
+
+        # Resize into place atomically; the new mtime invalidates the cached reader and card ETag
+        save_card_photo(tmp_path, filepath)
+
+        member.photo_filename = filename
+        member.last_modified = date.today()
+        session.commit()
+
+        return jsonify({"message": "Photo uploaded successfully.", "user_id": member.user_id}), 200
+
+    except RequestEntityTooLarge as e:
+        session.rollback()
+        return request_too_large(e)
+
+    except UnidentifiedImageError:
+        session.rollback()
+        return jsonify({"error": "Invalid photo. The request body is not a readable PNG or JPEG image."}), 400
+
+    except Image.DecompressionBombError:
+        session.rollback()
+        return jsonify({"error": "Invalid photo. The image dimensions are too large."}), 400
+
+    except OperationalError as e:
+        session.rollback()
+        print(f"Photo Upload DB Operational Error: {e}")
+        return jsonify({"error": "Database is unavailable. Cannot store photo."}), 500
+
+    except Exception as e:
+        session.rollback()
+        print(f"Photo Upload Error: {e}")
+        return jsonify({"error": f"Internal Server Error: {str(e)}"}), 500
+
     finally:
-        session.close()
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# --- BULK MEMBER IMPORT (MM-100) ---
+BULK_IMPORT_MAX_ROWS = 5000
+BULK_IMPORT_ROLES = ['SuperAdmin', 'ProvincialAdmin'] # Both bulk paths; DataEntry registers one member at a time
+BULK_TEXT_FIELDS = ('name', 'province', 'town', 'zone')
+
+def prepare_bulk_members(session, records):
+    """Validates raw member records and builds insert-ready rows.
+
+    Returns (rows, errors); errors lists problems by 1-based record number, and rows
+    should only be inserted when errors is empty.
+    """
+    rows, errors, seen_nrcs = [], [], set()
+    today = date.today()
+
+    for number, record in enumerate(records, start=1):
+        # JSON records can carry any type; the text columns only accept strings
+        wrong_type = [field for field in BULK_TEXT_FIELDS
+                      if record.get(field) is not None and not isinstance(record[field], str)]
+        if wrong_type:
+            errors.append(f"Record {number}: {', '.join(wrong_type)} must be text.")
+            continue
+
+        raw_nrc = record.get('nrc')
+        if raw_nrc is not None and (isinstance(raw_nrc, bool) or not isinstance(raw_nrc, (str, int))):
+            errors.append(f"Record {number}: nrc must be text.")
+            continue
+        nrc = str(raw_nrc or '').strip()
+        if not nrc:
+            errors.append(f"Record {number}: missing NRC.")
+            continue
+        if nrc in seen_nrcs:
+            errors.append(f"Record {number}: NRC {nrc} appears more than once in this import.")
+            continue
+        seen_nrcs.add(nrc)
+
+        try:
+            membership_end = date.fromisoformat(record.get('membership_end_date') or '2028-12-31')
+        except (TypeError, ValueError):
+            errors.append(f"Record {number}: invalid membership_end_date.")
+            continue
+
+        user_id = f"PCT-{today.year}-{new_ulid()}"
+        rows.append({
+            "user_id": user_id,
+            "name": record.get('name') or 'N/A',
+            "nrc": nrc,
+            "province": record.get('province') or 'Unknown',
+            "town": record.get('town') or 'N/A',
+            "zone": record.get('zone') or 'N/A',
+            "membership_start": today,
+            "membership_end": membership_end,
+            "status": 'Active',
+            "photo_filename": None, # Photos are attached per member after import
+            "last_modified": today,
+            "qr_payload": member_qr_payload(user_id, 'Active', membership_end)
+        })
+
+    # One query for every NRC in the batch instead of a lookup per record (MM-101)
+    if seen_nrcs:
+        existing = session.execute(
+            select(CampaignMember.nrc).where(CampaignMember.nrc.in_(seen_nrcs))
+        ).scalars().all()
+        errors.extend(f"NRC {nrc} already exists." for nrc in existing)
+
+    return rows, errors
+
+@app.route('/admin/members/bulk', methods=['POST'])
+@role_required(BULK_IMPORT_ROLES)
+def bulk_import_members(admin_user):
+    """Imports members from an uploaded CSV file (columns: name, nrc, province, town, zone, membership_end_date)."""
+    session = Session()
+    try:
+        csv_file = request.files.get('members_csv')
+        if not csv_file:
+            return jsonify({"error": "Missing CSV upload (members_csv)."}), 400
+
+        try:
+            records = list(csv.DictReader(TextIOWrapper(csv_file.stream, encoding='utf-8-sig')))
+        except (UnicodeDecodeError, csv.Error):
+            return jsonify({"error": "Could not read the CSV file. Save it as UTF-8 comma-separated values."}), 400
+        if not records:
+            return jsonify({"error": "The CSV file contains no member rows."}), 400
+        if len(records) > BULK_IMPORT_MAX_ROWS:
+            return jsonify({"error": f"Too many rows. The limit is {BULK_IMPORT_MAX_ROWS} per import."}), 400
+
+        rows, errors = prepare_bulk_members(session, records)
+        if errors:
+            return jsonify({"error": "Import rejected. No members were created.", "details": errors}), 400
+
+        # Bulk path: multi-row INSERT without per-object unit-of-work bookkeeping
+        session.bulk_insert_mappings(CampaignMember, rows)
+        session.commit()
+
+        return jsonify({
+            "message": f"Imported {len(rows)} Campaign Members successfully.",
+            "user_ids": [row["user_id"] for row in rows]
+        }), 201
+
+    except IntegrityError as e:
+        session.rollback()
+        print(f"Bulk Import Integrity Error: {e}")
+        return jsonify({"error": "One or more NRCs were registered concurrently. No members were created."}), 409
+
+    except RequestEntityTooLarge as e:
+        session.rollback()
+        return request_too_large(e)
+
+    except OperationalError as e:
+        session.rollback()
+        print(f"Bulk Import DB Operational Error: {e}")
+        return jsonify({"error": "Database is unavailable. Cannot import members."}), 500
+
+    except Exception as e:
+        session.rollback()
+        print(f"Bulk Import Error: {e}")
+        return jsonify({"error": f"Internal Server Error: {str(e)}"}), 500
+
+@app.route('/members/register/bulk', methods=['POST'])
+@role_required(BULK_IMPORT_ROLES)
+def register_members_bulk(admin_user):
+    """Registers a JSON array of members (same fields as /members/register) in a single INSERT.
+
+    Photos are not accepted here; upload each one afterwards with PUT /members/<user_id>/photo.
+    """
+    session = Session()
+    try:
+        records = request.get_json(silent=True)
+        if not isinstance(records, list) or not records:
+            return jsonify({"error": "Request body must be a non-empty JSON array of members."}), 400
+        if len(records) > BULK_IMPORT_MAX_ROWS:
+            return jsonify({"error": f"Too many members. The limit is {BULK_IMPORT_MAX_ROWS} per request."}), 400
+        if not all(isinstance(record, dict) for record in records):
+            return jsonify({"error": "Every array entry must be a JSON object."}), 400
+
+        rows, errors = prepare_bulk_members(session, records)
+        if errors:
+            return jsonify({"error": "Registration rejected. No members were created.", "details": errors}), 400
+
+        # Core INSERT with a parameter list: one multi-row statement, bypassing the unit of work
+        session.execute(CampaignMember.__table__.insert(), rows)
+        session.commit()
+
+        return jsonify({
+            "message": f"Registered {len(rows)} Campaign Members successfully.",
+            "user_ids": [row["user_id"] for row in rows]
+        }), 201
+
+    except IntegrityError as e:
+        session.rollback()
+        print(f"Bulk Registration Integrity Error: {e}")
+        return jsonify({"error": "One or more NRCs were registered concurrently. No members were created."}), 409
+
+    except OperationalError as e:
+        session.rollback()
+        print(f"Bulk Registration DB Operational Error: {e}")
+        return jsonify({"error": "Database is unavailable. Cannot register members."}), 500
+
+    except Exception as e:
+        session.rollback()
+        print(f"Bulk Registration Error: {e}")
+        return jsonify({"error": f"Internal Server Error: {str(e)}"}), 500
 
 # --- FEATURE MM-104: ADVANCED SEARCH & FILTERING (SEC-400) ---
+# Characters kept in a search word; everything else (including tsquery operators and quotes) is dropped
+SEARCH_WORD_STRIP = re.compile(r"[^\w/.-]")
+
+def prefix_tsquery(search_term):
+    """Builds a to_tsquery('simple', ...) string that matches every word of search_term as a prefix.
+
+    "ban 111/" becomes "'ban':* & '111/':*", so partly typed surnames and NRCs match whole lexemes.
+    Returns None if no word survives sanitizing.
+    """
+    words = (SEARCH_WORD_STRIP.sub('', word) for word in search_term.split())
+    terms = [f"'{word}':*" for word in words if word]
+    return ' & '.join(terms) or None
+
 @app.route('/admin/members/search', methods=['GET'])
 @role_required(['SuperAdmin', 'ProvincialAdmin', 'DataEntry'])
 def member_search(admin_user):
     """Searches and filters member records based on query parameters."""
     session = Session()
     try:
-        query = session.query(CampaignMember)
+        # Select only the columns returned to the client rather than hydrating full ORM objects
+        query = select(
+            CampaignMember.id,
+            CampaignMember.user_id,
+            CampaignMember.name,
+            CampaignMember.nrc,
+            CampaignMember.province,
+            CampaignMember.status,
+            CampaignMember.membership_end
+        )
         
         # 1. Apply Dynamic Filters
         if request.args.get('province'):
-            query = query.filter(CampaignMember.province == request.args['province'])
+            query = query.where(CampaignMember.province == request.args['province'])
         if request.args.get('status'):
-            query = query.filter(CampaignMember.status == request.args['status'])
+            query = query.where(CampaignMember.status == request.args['status'])
 
-        # Search against multiple fields for partial matches
+        # Search against multiple fields: word-prefix matches on the indexed full-text vector on
+        # PostgreSQL, partial matches on the SQLite dev database (which has no search_tsv column)
         search_term = request.args.get('q')
-        if search_term:
+        if search_term and session.bind.dialect.name == 'postgresql':
+            tsquery = prefix_tsquery(search_term)
+            if tsquery is None:
+                query = query.where(false()) # Only punctuation: nothing can match
+            else:
+                query = query.where(
+                    text("search_tsv @@ to_tsquery('simple', :q)").bindparams(q=tsquery)
+                )
+        elif search_term:
             search_like = f"%{search_term}%"
-            query = query.filter(or_(
+            query = query.where(or_(
                 CampaignMember.name.ilike(search_like),
                 CampaignMember.nrc.ilike(search_like),
                 CampaignMember.town.ilike(search_like)
             ))
 
-        # 2. Execute Query and Format Results
-        members = query.limit(100).all()
+        # 2. Keyset Pagination: resume after the last id of the previous page instead of using OFFSET
+        after_id = request.args.get('after_id', 0, type=int)
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+        query = query.where(CampaignMember.id > after_id).order_by(CampaignMember.id).limit(limit)
+
+        # 3. Execute Query and Format Results
+        members = session.execute(query).all()
         
         results = [{
             "user_id": m.user_id,
@@ -219,13 +712,15 @@ def member_search(admin_user):
             "nrc": m.nrc,
             "province": m.province,
             "status": m.status,
-            "membership_end": m.membership_end.isoformat()
+            "membership_end": m.membership_end
         } for m in members]
 
         return jsonify({
             "admin_role": admin_user.role,
             "total_results": len(results),
-            "members": results
+            "members": results,
+            # Pass back as ?after_id= to fetch the next page; null once the last page is reached
+            "next_cursor": members[-1].id if len(members) == limit else None
         })
 
     except OperationalError as e:
@@ -235,41 +730,41 @@ def member_search(admin_user):
     except Exception as e:
         print(f"Search Error: {e}")
         return jsonify({"error": f"Internal Server Error: {str(e)}"}, 500)
-    
-    finally:
-        session.close()
 
 # --- FEATURE GM-202: BULK DATA REPORTING (Grouped) (SEC-400) ---
-@app.route('/admin/reports/region', methods=['GET'])
-@role_required(['SuperAdmin', 'ProvincialAdmin'])
-def region_report(admin_user):
-    """Generates a summary of member counts grouped by Province and Status."""
+MEMBER_STATUSES = ('Active', 'Expired', 'Suspended')
+
+@cached(TTLCache(maxsize=1, ttl=60), lock=threading.Lock())
+def region_summary():
+    """Aggregates member counts by Province and Status, recomputed at most once a minute."""
     session = Session()
-    try:
-        report_data = session.query(
+    # One row per province with the status pivot done by aggregate FILTER clauses in the database
+    report_data = session.execute(
+        select(
             CampaignMember.province,
-            CampaignMember.status,
-            func.count(CampaignMember.id).label('member_count')
+            func.count().label('total'),
+            *(func.count().filter(CampaignMember.status == status).label(status) for status in MEMBER_STATUSES)
         ).group_by(
-            CampaignMember.province,
-            CampaignMember.status
+            CampaignMember.province
         ).order_by(
-            CampaignMember.province,
-            CampaignMember.status
-        ).all()
-        
-        results = {}
-        for province, status, count in report_data:
-            if province not in results:
-                results[province] = {'Total': 0}
-            
-            results[province][status] = count
-            results[province]['Total'] += count
+            CampaignMember.province
+        )
+    ).mappings()
+    
+    return {
+        row['province']: {'Total': row['total'], **{status: row[status] for status in MEMBER_STATUSES}}
+        for row in report_data
+    }
 
+@app.route('/admin/reports/region', methods=['GET'])
+@role_required(['SuperAdmin', 'ProvincialAdmin'])
+def region_report(admin_user):
+    """Generates a summary of member counts grouped by Province and Status."""
+    try:
         return jsonify({
             "admin_role": admin_user.role,
             "report_type": "Regional Member Status Summary (GM-202)",
-            "summary": results
+            "summary": region_summary()
         })
 
     except OperationalError as e:
@@ -279,17 +774,276 @@ def region_report(admin_user):
     except Exception as e:
         print(f"Report Error: {e}")
         return jsonify({"error": f"Internal Server Error: {str(e)}"}, 500)
-    
-    finally:
-        session.close()
 
 # --- FEATURE IDG-300: DIGITAL ID CARD GENERATION ---
+QR_BORDER_MODULES = 4
+QR_PIXELS_PER_MODULE = 4
+
+def qr_image_path(qr_data):
+    """Returns the path of a PNG QR code for qr_data, rendering it on first use.
+
+    The file name is derived from the payload, so a status or expiry change yields a new image.
+    """
+    path = os.path.join(QR_DIR, f"{hashlib.md5(qr_data.encode()).hexdigest()}.png")
+    if os.path.exists(path):
+        return path
+
+    code = qrencoder.QRCode(None, qrencoder.QRErrorCorrectLevel.L)
+    code.addData(qr_data)
+    code.make()
+
+    size = code.getModuleCount() + 2 * QR_BORDER_MODULES
+    img = Image.new('1', (size, size), 1)
+    pixels = img.load()
+    for row, modules in enumerate(code.modules):
+        for col, is_dark in enumerate(modules):
+            if is_dark:
+                pixels[col + QR_BORDER_MODULES, row + QR_BORDER_MODULES] = 0
+    img = img.resize((size * QR_PIXELS_PER_MODULE,) * 2, Image.NEAREST)
+
+    # Write then rename so concurrent workers never read a partially written file
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    img.save(tmp_path, 'PNG')
+    os.replace(tmp_path, path)
+    schedule_render_cache_sweep()
+    return path
+
+@lru_cache(maxsize=512)
+def qr_image_reader(qr_data):
+    """Returns a cached ImageReader for a member's QR code; identical payloads yield identical images."""
+    return ImageReader(qr_image_path(qr_data))
+
+def card_etag(card):
+    """Builds an HTTP validator from a card_fields() snapshot.
+
+    Every printed field (and the QR payload) is hashed along with the photo's mtime, so the ETag
+    changes whenever the rendered card would, even for corrections that leave last_modified alone.
+    """
+    try:
+        photo_mtime = os.path.getmtime(os.path.join(UPLOAD_DIR, card['photo_filename']))
+    except (OSError, TypeError):
+        photo_mtime = None
+    key = orjson.dumps([card, photo_mtime], option=orjson.OPT_SORT_KEYS)
+    return hashlib.md5(key).hexdigest()
+
+# Cached ImageReaders serve JPEG data from one shared buffer, so concurrent renders take turns drawing them
+IMAGE_READER_LOCK = threading.Lock()
+
+# Campaign logo, decoded once per process instead of on every card
+LOGO_PATH = os.path.join(os.path.dirname(__file__), 'UPND.jpg')
+LOGO_IMAGE = ImageReader(LOGO_PATH) if os.path.exists(LOGO_PATH) else None
+
+@lru_cache(maxsize=2048)
+def _cached_image_reader(path, mtime):
+    return ImageReader(path)
+
+def photo_reader(photo_filename):
+    """Returns a cached ImageReader for a member photo, or None if the file is missing.
+
+    The file's mtime is part of the cache key, so a replaced photo is read afresh.
+    """
+    if not photo_filename:
+        return None
+    path = os.path.join(UPLOAD_DIR, photo_filename)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    return _cached_image_reader(path, mtime)
+
+def card_fields(member):
+    """Copies what the card shows into a plain dict while the member is attached to the session.
+
+    The render runs on another thread, so it must not touch ORM objects.
+    """
+    return {
+        "user_id": member.user_id,
+        "name": member.name,
+        "nrc": member.nrc,
+        "town": member.town,
+        "province": member.province,
+        "membership_start": member.membership_start,
+        "membership_end": member.membership_end,
+        "photo_filename": member.photo_filename,
+        "qr_data": member.qr_payload or member_qr_payload(member.user_id, member.status, member.membership_end),
+    }
+
+# Resolve the card's fonts (and load their metrics) at import, not during the first card request
+CARD_FONTS = ("Helvetica", "Helvetica-Bold", "Helvetica-BoldOblique")
+for font_name in CARD_FONTS:
+    pdfmetrics.getFont(font_name)
+
+def render_card_pdf(card):
+    """Draws the PDF Membership Card (PCT-MC) for a plain dict of member fields.
+
+    Returns a read-only view of the in-memory PDF rather than a copy of it.
+    """
+    # Use BytesIO to create the PDF in memory (IDG-300)
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # --- Card Design Parameters (Enhanced IDG-301 - MATCHING SILVER PDF) ---
+    CARD_WIDTH = 380  # Increased width slightly for a wider card
+    CARD_HEIGHT = 240 # Increased height
+    X_OFFSET = 50 
+    Y_OFFSET = height - CARD_HEIGHT - 50 
+
+    # --- Define Colors ---
+    COLOR_BG_WHITE = colors.white
+    COLOR_PRIMARY_RED = colors.Color(0.85, 0.27, 0.2) 
+    COLOR_DARK_BLUE = colors.Color(0.05, 0.2, 0.4) # Dark blue for text/accents
+    COLOR_ACCENT_YELLOW = colors.Color(0.95, 0.75, 0.0) # Yellow for the logo background
+    COLOR_TEXT_LIGHT = colors.white
+
+    # --- 1. Draw Card Background and Border ---
+    p.setFillColor(COLOR_BG_WHITE)
+    p.setStrokeColor(COLOR_DARK_BLUE)
+    p.setLineWidth(2)
+    p.roundRect(X_OFFSET, Y_OFFSET, CARD_WIDTH, CARD_HEIGHT, 15, stroke=1, fill=1) # Rounded corners
+
+    # Draw Inner Red Background (Main Card Body)
+    p.setFillColor(COLOR_PRIMARY_RED)
+    p.rect(X_OFFSET + 3, Y_OFFSET + 3, CARD_WIDTH - 6, CARD_HEIGHT - 6, stroke=0, fill=1)
+
+    # --- Background Element (Simulate the ZAMBIA coat of arms graphic) ---
+    # Draw a black band across the center, matching the PDF reference visually
+    p.setFillColor(colors.black)
+    p.rect(X_OFFSET + 3, Y_OFFSET + 3, CARD_WIDTH - 6, 80, stroke=0, fill=1)
+
+    # --- 2. Logo and Header Block ---
+    LOGO_X = X_OFFSET + 10
+    LOGO_Y = Y_OFFSET + CARD_HEIGHT - 65 
+
+    HEADER_X = X_OFFSET + 90
+    HEADER_Y_START = Y_OFFSET + CARD_HEIGHT - 35
+
+    # Logo Integration (UPND.jpg)
+    try:
+        if LOGO_IMAGE is not None:
+            with IMAGE_READER_LOCK:
+                p.drawImage(LOGO_IMAGE, LOGO_X, LOGO_Y, 70, 70, preserveAspectRatio=True, mask='auto')
+
+        p.setFillColor(COLOR_TEXT_LIGHT)
+        p.setFont("Helvetica-Bold", 12)
+        p.drawString(LOGO_X + 2, Y_OFFSET + 15, "ONE ZAMBIA") # Left bottom slogan
+        p.drawString(X_OFFSET + CARD_WIDTH - 80, Y_OFFSET + 15, "ONE NATION") # Right bottom slogan
+
+    except Exception as e:
+        # Fallback for missing/error logo
+        p.setFillColor(COLOR_TEXT_LIGHT)
+        p.setFont("Helvetica-Bold", 10)
+        p.drawString(LOGO_X, Y_OFFSET + CARD_HEIGHT - 35, "Logo Missing")
+
+    # Header Text (Shifted to the right of the logo space)
+    p.setFillColor(COLOR_TEXT_LIGHT)
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(HEADER_X, HEADER_Y_START, "PRESIDENTIAL CAMPAIGN TEAM")
+    p.setFont("Helvetica", 10)
+    p.drawString(HEADER_X, HEADER_Y_START - 15, "OFFICE OF THE SECRETARY GENERAL")
+    p.drawString(HEADER_X, HEADER_Y_START - 30, "MEMBERSHIP CARD")
+
+    # --- 3. Member Details (Two Columns) ---
+
+    # Define Columns for Labels and Values
+    LABEL_X = X_OFFSET + 90
+    VALUE_X = X_OFFSET + 165 # Position for the value field
+    DETAIL_Y_START = Y_OFFSET + CARD_HEIGHT - 100
+    LINE_SPACING = 18 # Increased spacing to match the PDF
+
+    # Set up a generic field value. We will re-use this for all lines.
+    def draw_detail(canvas, y, label, value):
+        canvas.setFillColor(COLOR_TEXT_LIGHT)
+        canvas.setFont("Helvetica", 10)
+        canvas.drawString(LABEL_X, y, label)
+
+        canvas.setFillColor(COLOR_TEXT_LIGHT)
+        canvas.setFont("Helvetica-Bold", 10)
+        canvas.drawString(VALUE_X, y, f": {value}")
+
+    # 3.1 Personal Details
+    draw_detail(p, DETAIL_Y_START, "NAME", card['name'].upper())
+    draw_detail(p, DETAIL_Y_START - LINE_SPACING, "NRC", card['nrc'])
+
+    # 3.2 Location/Role Details
+    # NOTE: We use POSITION for Zone/Town, and LOCATION for Province/HQ text
+    draw_detail(p, DETAIL_Y_START - (2 * LINE_SPACING), "POSITION", f"Campaign Team Member")
+    draw_detail(p, DETAIL_Y_START - (3 * LINE_SPACING), "LOCATION", f"{card['town'].upper()}, {card['province'].upper()}")
+
+    # 3.3 Issue Details
+    draw_detail(p, DETAIL_Y_START - (4.5 * LINE_SPACING), "DATE OF ISSUE", card['membership_start'].isoformat())
+    draw_detail(p, DETAIL_Y_START - (5.5 * LINE_SPACING), "ISSUED BY", "DR. Monze Muleya (Sample)") 
+
+    # Signature/Chairman Slot
+    p.setFillColor(COLOR_DARK_BLUE)
+    p.setFont("Helvetica-Bold", 10)
+    p.drawString(X_OFFSET + 250, DETAIL_Y_START - (5.5 * LINE_SPACING), "National Chairperson.")
+    p.setFont("Helvetica", 8)
+    p.drawString(X_OFFSET + 250, DETAIL_Y_START - (6 * LINE_SPACING), "HAKAINDE HICHILEMA (Sample)")
+
+    # --- 4. Photo Placeholder (Left Column) ---
+    PHOTO_SIZE = 80
+    PHOTO_X = X_OFFSET + 5
+    PHOTO_Y = Y_OFFSET + CARD_HEIGHT - 110 - PHOTO_SIZE # Adjusted Y to be below Logo/Header area
+
+    p.setFillColor(colors.white)
+    p.setStrokeColor(COLOR_DARK_BLUE)
+    p.setLineWidth(1)
+    p.rect(PHOTO_X, PHOTO_Y, PHOTO_SIZE, PHOTO_SIZE, stroke=1, fill=1) # Simple square frame
+
+    # Draw Official Photo ID (ID Face)
+    try:
+        img = photo_reader(card['photo_filename'])
+        if img is not None:
+            with IMAGE_READER_LOCK:
+                p.drawImage(img, PHOTO_X + 2, PHOTO_Y + 2, PHOTO_SIZE - 4, PHOTO_SIZE - 4, preserveAspectRatio=True, mask='auto')
+        else:
+            p.setFillColor(COLOR_DARK_BLUE)
+            p.setFont("Helvetica-Bold", 8)
+            p.drawCentredString(PHOTO_X + PHOTO_SIZE/2, PHOTO_Y + PHOTO_SIZE/2 + 5, "OFFICIAL PHOTO ID")
+            p.drawCentredString(PHOTO_X + PHOTO_SIZE/2, PHOTO_Y + PHOTO_SIZE/2 - 5, "Missing (SEC-402)")
+    except Exception:
+        p.setFillColor(COLOR_DARK_BLUE)
+        p.setFont("Helvetica-Bold", 8)
+        p.drawCentredString(PHOTO_X + PHOTO_SIZE/2, PHOTO_Y + PHOTO_SIZE/2 + 5, "PHOTO ERROR")
+        p.drawCentredString(PHOTO_X + PHOTO_SIZE/2, PHOTO_Y + PHOTO_SIZE/2 - 5, "Placeholder")
+
+    # --- 5. QR Code (Verification/SN) ---
+    QR_CODE_SIZE = 50
+    QR_X = X_OFFSET + 10
+    QR_Y = Y_OFFSET + 40 
+
+    with IMAGE_READER_LOCK:
+        p.drawImage(qr_image_reader(card['qr_data']), QR_X, QR_Y, QR_CODE_SIZE, QR_CODE_SIZE) # Position bottom-left
+
+    p.setFillColor(COLOR_DARK_BLUE)
+    p.setFont("Helvetica", 8)
+    p.drawString(QR_X + QR_CODE_SIZE + 5, QR_Y + QR_CODE_SIZE - 10, "SN: (Scan for Verification)")
+    p.drawString(QR_X + QR_CODE_SIZE + 5, QR_Y + QR_CODE_SIZE - 20, "ID: " + card['user_id']) 
+
+    # --- 6. Membership Period (Bottom Bar) ---
+    BAND_HEIGHT = 20
+    BAND_Y = Y_OFFSET + 3 
+    p.setFillColor(COLOR_DARK_BLUE) # Use a prominent campaign color for the bar
+    p.rect(X_OFFSET + 3, BAND_Y, CARD_WIDTH - 6, BAND_HEIGHT, stroke=0, fill=1) 
+
+    p.setFont("Helvetica-BoldOblique", 11)
+    p.setFillColor(COLOR_ACCENT_YELLOW)
+    p.drawCentredString(X_OFFSET + CARD_WIDTH / 2, BAND_Y + 7, 
+                       f"VALID UNTIL: {card['membership_end'].isoformat()}")
+
+
+    # Finalize and Return PDF
+    p.showPage()
+    p.save()
+    return buffer.getbuffer().toreadonly()
+
 @app.route('/members/<string:user_id>/card', methods=['GET'])
 def generate_member_card(user_id):
     """Generates the secure PDF Membership Card (PCT-MC) with enhanced design, matching the Silver PDF look."""
     session = Session()
     try:
-        member = session.query(CampaignMember).filter_by(user_id=user_id).first()
+        member = session.execute(MEMBER_BY_USER_ID, {"user_id": user_id}).scalar_one_or_none()
 
         if not member:
             return jsonify({"error": "Member not found."}, 404)
@@ -297,179 +1051,31 @@ def generate_member_card(user_id):
         if member.status != 'Active':
             return jsonify({"error": f"Card generation failed: Member status is {member.status}. Access Denied."}, 403)
 
-        # Use BytesIO to create the PDF in memory (IDG-300)
-        buffer = BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-        
-        # --- Card Design Parameters (Enhanced IDG-301 - MATCHING SILVER PDF) ---
-        CARD_WIDTH = 380  # Increased width slightly for a wider card
-        CARD_HEIGHT = 240 # Increased height
-        X_OFFSET = 50 
-        Y_OFFSET = height - CARD_HEIGHT - 50 
-        
-        # --- Define Colors ---
-        COLOR_BG_WHITE = colors.white
-        COLOR_PRIMARY_RED = colors.Color(0.85, 0.27, 0.2) 
-        COLOR_DARK_BLUE = colors.Color(0.05, 0.2, 0.4) # Dark blue for text/accents
-        COLOR_ACCENT_YELLOW = colors.Color(0.95, 0.75, 0.0) # Yellow for the logo background
-        COLOR_TEXT_LIGHT = colors.white
-        
-        # --- 1. Draw Card Background and Border ---
-        p.setFillColor(COLOR_BG_WHITE)
-        p.setStrokeColor(COLOR_DARK_BLUE)
-        p.setLineWidth(2)
-        p.roundRect(X_OFFSET, Y_OFFSET, CARD_WIDTH, CARD_HEIGHT, 15, stroke=1, fill=1) # Rounded corners
-
-        # Draw Inner Red Background (Main Card Body)
-        p.setFillColor(COLOR_PRIMARY_RED)
-        p.rect(X_OFFSET + 3, Y_OFFSET + 3, CARD_WIDTH - 6, CARD_HEIGHT - 6, stroke=0, fill=1)
-        
-        # --- Background Element (Simulate the ZAMBIA coat of arms graphic) ---
-        # Draw a black band across the center, matching the PDF reference visually
-        p.setFillColor(colors.black)
-        p.rect(X_OFFSET + 3, Y_OFFSET + 3, CARD_WIDTH - 6, 80, stroke=0, fill=1)
-        
-        # --- 2. Logo and Header Block ---
-        LOGO_X = X_OFFSET + 10
-        LOGO_Y = Y_OFFSET + CARD_HEIGHT - 65 
-        
-        HEADER_X = X_OFFSET + 90
-        HEADER_Y_START = Y_OFFSET + CARD_HEIGHT - 35
-        
-        # Logo Integration (UPND.jpg)
-        try:
-            script_dir = os.path.dirname(__file__)
-            logo_path = os.path.join(script_dir, 'UPND.jpg') 
-            if os.path.exists(logo_path):
-                logo = ImageReader(logo_path)
-                p.drawImage(logo, LOGO_X, LOGO_Y, 70, 70, preserveAspectRatio=True, mask='auto')
-            
-            p.setFillColor(COLOR_TEXT_LIGHT)
-            p.setFont("Helvetica-Bold", 12)
-            p.drawString(LOGO_X + 2, Y_OFFSET + 15, "ONE ZAMBIA") # Left bottom slogan
-            p.drawString(X_OFFSET + CARD_WIDTH - 80, Y_OFFSET + 15, "ONE NATION") # Right bottom slogan
-            
-        except Exception as e:
-            # Fallback for missing/error logo
-            p.setFillColor(COLOR_TEXT_LIGHT)
-            p.setFont("Helvetica-Bold", 10)
-            p.drawString(LOGO_X, Y_OFFSET + CARD_HEIGHT - 35, "Logo Missing")
-
-        # Header Text (Shifted to the right of the logo space)
-        p.setFillColor(COLOR_TEXT_LIGHT)
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(HEADER_X, HEADER_Y_START, "PRESIDENTIAL CAMPAIGN TEAM")
-        p.setFont("Helvetica", 10)
-        p.drawString(HEADER_X, HEADER_Y_START - 15, "OFFICE OF THE SECRETARY GENERAL")
-        p.drawString(HEADER_X, HEADER_Y_START - 30, "MEMBERSHIP CARD")
-        
-        # --- 3. Member Details (Two Columns) ---
-        
-        # Define Columns for Labels and Values
-        LABEL_X = X_OFFSET + 90
-        VALUE_X = X_OFFSET + 165 # Position for the value field
-        DETAIL_Y_START = Y_OFFSET + CARD_HEIGHT - 100
-        LINE_SPACING = 18 # Increased spacing to match the PDF
-
-        # Set up a generic field value. We will re-use this for all lines.
-        def draw_detail(canvas, y, label, value):
-            canvas.setFillColor(COLOR_TEXT_LIGHT)
-            canvas.setFont("Helvetica", 10)
-            canvas.drawString(LABEL_X, y, label)
-            
-            canvas.setFillColor(COLOR_TEXT_LIGHT)
-            canvas.setFont("Helvetica-Bold", 10)
-            canvas.drawString(VALUE_X, y, f": {value}")
+        # Skip rendering entirely when the client already holds the current card
+        card = card_fields(member)
+        etag = card_etag(card)
+        if request.if_none_match.contains(etag):
+            not_modified = app.response_class(status=304)
+            not_modified.set_etag(etag)
+            return not_modified
 
-        # 3.1 Personal Details
-        draw_detail(p, DETAIL_Y_START, "NAME", member.name.upper())
-        draw_detail(p, DETAIL_Y_START - LINE_SPACING, "NRC", member.nrc)
-        
-        # 3.2 Location/Role Details
-        # NOTE: We use POSITION for Zone/Town, and LOCATION for Province/HQ text
-        draw_detail(p, DETAIL_Y_START - (2 * LINE_SPACING), "POSITION", f"Campaign Team Member")
-        draw_detail(p, DETAIL_Y_START - (3 * LINE_SPACING), "LOCATION", f"{member.town.upper()}, {member.province.upper()}")
-        
-        # 3.3 Issue Details
-        draw_detail(p, DETAIL_Y_START - (4.5 * LINE_SPACING), "DATE OF ISSUE", member.membership_start.strftime('%Y-%m-%d'))
-        draw_detail(p, DETAIL_Y_START - (5.5 * LINE_SPACING), "ISSUED BY", "DR. Monze Muleya (Sample)") 
-        
-        # Signature/Chairman Slot
-        p.setFillColor(COLOR_DARK_BLUE)
-        p.setFont("Helvetica-Bold", 10)
-        p.drawString(X_OFFSET + 250, DETAIL_Y_START - (5.5 * LINE_SPACING), "National Chairperson.")
-        p.setFont("Helvetica", 8)
-        p.drawString(X_OFFSET + 250, DETAIL_Y_START - (6 * LINE_SPACING), "HAKAINDE HICHILEMA (Sample)")
-        
-        # --- 4. Photo Placeholder (Left Column) ---
-        PHOTO_SIZE = 80
-        PHOTO_X = X_OFFSET + 5
-        PHOTO_Y = Y_OFFSET + CARD_HEIGHT - 110 - PHOTO_SIZE # Adjusted Y to be below Logo/Header area
-
-        p.setFillColor(colors.white)
-        p.setStrokeColor(COLOR_DARK_BLUE)
-        p.setLineWidth(1)
-        p.rect(PHOTO_X, PHOTO_Y, PHOTO_SIZE, PHOTO_SIZE, stroke=1, fill=1) # Simple square frame
-
-        # Draw Official Photo ID (ID Face)
-        photo_path = os.path.join(UPLOAD_DIR, member.photo_filename)
+        # Rendered cards are kept on disk under their ETag, so only a changed card is drawn again
+        path = card_file_path(etag)
         try:
-            if os.path.exists(photo_path):
-                img = ImageReader(photo_path)
-                p.drawImage(img, PHOTO_X + 2, PHOTO_Y + 2, PHOTO_SIZE - 4, PHOTO_SIZE - 4, preserveAspectRatio=True, mask='auto')
-            else:
-                p.setFillColor(COLOR_DARK_BLUE)
-                p.setFont("Helvetica-Bold", 8)
-                p.drawCentredString(PHOTO_X + PHOTO_SIZE/2, PHOTO_Y + PHOTO_SIZE/2 + 5, "OFFICIAL PHOTO ID")
-                p.drawCentredString(PHOTO_X + PHOTO_SIZE/2, PHOTO_Y + PHOTO_SIZE/2 - 5, "Missing (SEC-402)")
-        except Exception:
-            p.setFillColor(COLOR_DARK_BLUE)
-            p.setFont("Helvetica-Bold", 8)
-            p.drawCentredString(PHOTO_X + PHOTO_SIZE/2, PHOTO_Y + PHOTO_SIZE/2 + 5, "PHOTO ERROR")
-            p.drawCentredString(PHOTO_X + PHOTO_SIZE/2, PHOTO_Y + PHOTO_SIZE/2 - 5, "Placeholder")
-        
-        # --- 5. QR Code (Verification/SN) ---
-        QR_CODE_SIZE = 50
-        QR_X = X_OFFSET + 10
-        QR_Y = Y_OFFSET + 40 
-        
-        qr_data = f"PCT-VERIFY:{member.user_id}|STATUS:{member.status}|EXPIRY:{member.membership_end.strftime('%Y-%m-%d')}" 
-        qrw = qr.QrCodeWidget(qr_data)
-        
-        bounds = qrw.getBounds()
-        x1, y1, x2, y2 = bounds
-        qr_drawing = Drawing(QR_CODE_SIZE, QR_CODE_SIZE, transform=[QR_CODE_SIZE/(x2-x1),0,0,QR_CODE_SIZE/(y2-y1),-x1*QR_CODE_SIZE/(x2-x1),-y1*QR_CODE_SIZE/(y2-y1)])
-        qr_drawing.add(qrw)
-        renderPDF.draw(qr_drawing, p, QR_X, QR_Y) # Position bottom-left
-
-        p.setFillColor(COLOR_DARK_BLUE)
-        p.setFont("Helvetica", 8)
-        p.drawString(QR_X + QR_CODE_SIZE + 5, QR_Y + QR_CODE_SIZE - 10, "SN: (Scan for Verification)")
-        p.drawString(QR_X + QR_CODE_SIZE + 5, QR_Y + QR_CODE_SIZE - 20, "ID: " + member.user_id) 
-        
-        # --- 6. Membership Period (Bottom Bar) ---
-        BAND_HEIGHT = 20
-        BAND_Y = Y_OFFSET + 3 
-        p.setFillColor(COLOR_DARK_BLUE) # Use a prominent campaign color for the bar
-        p.rect(X_OFFSET + 3, BAND_Y, CARD_WIDTH - 6, BAND_HEIGHT, stroke=0, fill=1) 
-
-        p.setFont("Helvetica-BoldOblique", 11)
-        p.setFillColor(COLOR_ACCENT_YELLOW)
-        p.drawCentredString(X_OFFSET + CARD_WIDTH / 2, BAND_Y + 7, 
-                           f"VALID UNTIL: {member.membership_end.strftime('%Y-%m-%d')}")
+            # Mark the cached file as recently used so the cache sweep keeps it
+            os.utime(path)
+        except FileNotFoundError:
+            store_card_pdf(path, EXECUTOR.submit(render_card_pdf, card).result())
 
-
-        # Finalize and Return PDF
-        p.showPage()
-        p.save()
-        
-        buffer.seek(0)
+        # Serve from the file: the WSGI server streams it (sendfile where available), so no
+        # request holds the whole PDF in memory
         return send_file(
-            buffer,
+            path,
             as_attachment=True,
             download_name=f"PCT_ID_Card_{member.user_id}.pdf",
-            mimetype='application/pdf'
+            mimetype='application/pdf',
+            etag=etag,
+            max_age=300
         )
 
     except OperationalError as e:
@@ -479,29 +1085,233 @@ def generate_member_card(user_id):
     except Exception as e:
         print(f"PDF Generation Error: {e}")
         return jsonify({"error": f"Internal Server Error during PDF generation: {str(e)}"}, 500)
-    
+
+# --- Background card rendering (IDG-300) ---
+def card_file_path(job_id):
+    """Returns the on-disk location of a rendered card, or None if job_id is not a card ETag."""
+    if len(job_id) != 32 or any(c not in string.hexdigits for c in job_id):
+        return None
+    return os.path.join(CARD_DIR, f"{job_id}.pdf")
+
+def store_card_pdf(path, pdf_bytes):
+    """Writes a rendered card to path atomically, so readers never see a partial file."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as out:
+        out.write(pdf_bytes)
+    os.replace(tmp_path, path)
+    schedule_render_cache_sweep()
+
+# Queued renders get their own small pool, so a burst of jobs cannot starve the EXECUTOR
+# that request threads wait on (logins, registrations, GET /card)
+CARD_JOB_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+# Card files with a render queued or running; repeat requests for one of these are not queued again
+CARD_JOBS_IN_FLIGHT = set()
+CARD_JOBS_LOCK = threading.Lock()
+
+# Every change to a member's card or QR payload writes new files under a new name, so files
+# not used for a week are deleted. Sweeps run in the background, at most once an hour.
+RENDER_CACHE_MAX_AGE = 7 * 24 * 60 * 60
+RENDER_CACHE_SWEEP_INTERVAL = 60 * 60
+_last_render_cache_sweep = 0.0
+RENDER_CACHE_SWEEP_LOCK = threading.Lock()
+
+def schedule_render_cache_sweep():
+    """Queues sweep_render_caches() on the card job pool if the last sweep is more than an interval old."""
+    global _last_render_cache_sweep
+    now = time.time()
+    with RENDER_CACHE_SWEEP_LOCK:
+        if now - _last_render_cache_sweep < RENDER_CACHE_SWEEP_INTERVAL:
+            return
+        _last_render_cache_sweep = now
+    CARD_JOB_EXECUTOR.submit(sweep_render_caches)
+
+def sweep_render_caches():
+    """Deletes card PDFs and QR images (plus leftover .error/.tmp files) older than RENDER_CACHE_MAX_AGE."""
+    cutoff = time.time() - RENDER_CACHE_MAX_AGE
+    removed_qr = False
+    for directory in (CARD_DIR, QR_DIR):
+        for entry in os.scandir(directory):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed_qr = removed_qr or directory == QR_DIR
+            except OSError:
+                pass # Already removed by another worker
+    if removed_qr:
+        # Memoized readers may refer to deleted PNGs; drop them so the images are rebuilt on demand
+        qr_image_reader.cache_clear()
+
+# A queued job leaves a .pending marker next to its card file until it finishes. Markers are
+# shared by all workers; one older than this belongs to a job lost with its worker.
+CARD_JOB_TIMEOUT = 5 * 60
+
+def card_job_pending(path):
+    """True if a render for path was queued less than CARD_JOB_TIMEOUT ago and has not finished."""
+    try:
+        return time.time() - os.path.getmtime(f"{path}.pending") < CARD_JOB_TIMEOUT
+    except OSError:
+        return False
+
+def render_card_to_file(card, path):
+    """Background job: renders a card and stores it at path, leaving a .error file if rendering fails."""
+    try:
+        store_card_pdf(path, render_card_pdf(card))
+    except Exception as e:
+        print(f"Card Render Job Error: {e}")
+        with open(f"{path}.error", 'w') as out:
+            out.write(str(e))
     finally:
-        session.close()
+        with CARD_JOBS_LOCK:
+            CARD_JOBS_IN_FLIGHT.discard(path)
+            try:
+                os.remove(f"{path}.pending")
+            except FileNotFoundError:
+                pass
+
+def current_card_job_path(user_id, job_id):
+    """Returns the card file for job_id if it is the current card of member user_id, otherwise None."""
+    path = card_file_path(job_id)
+    member = Session().execute(MEMBER_BY_USER_ID, {"user_id": user_id}).scalar_one_or_none()
+    if path is None or member is None or card_etag(card_fields(member)) != job_id:
+        return None
+    return path
+
+@app.route('/members/<string:user_id>/card', methods=['POST'])
+@role_required(['SuperAdmin', 'ProvincialAdmin', 'DataEntry'])
+def queue_member_card(admin_user, user_id):
+    """Queues the membership card for rendering and returns a job id to poll, without holding the request open."""
+    session = Session()
+    try:
+        member = session.execute(MEMBER_BY_USER_ID, {"user_id": user_id}).scalar_one_or_none()
+
+        if not member:
+            return jsonify({"error": "Member not found."}), 404
+
+        if member.status != 'Active':
+            return jsonify({"error": f"Card generation failed: Member status is {member.status}. Access Denied."}), 403
+
+        # The job id is the card's ETag, so an unchanged member reuses the card already rendered
+        card = card_fields(member)
+        job_id = card_etag(card)
+        path = card_file_path(job_id)
+        with CARD_JOBS_LOCK:
+            try:
+                os.utime(path) # Already rendered: mark it used so the cache sweep keeps it
+                needs_render = False
+            except FileNotFoundError:
+                needs_render = path not in CARD_JOBS_IN_FLIGHT and not card_job_pending(path)
+            if needs_render:
+                CARD_JOBS_IN_FLIGHT.add(path)
+                open(f"{path}.pending", 'w').close()
+
+        if needs_render:
+            if os.path.exists(f"{path}.error"):
+                os.remove(f"{path}.error")
+            try:
+                CARD_JOB_EXECUTOR.submit(render_card_to_file, card, path)
+            except Exception:
+                with CARD_JOBS_LOCK:
+                    CARD_JOBS_IN_FLIGHT.discard(path)
+                    os.remove(f"{path}.pending")
+                raise
+
+        return jsonify({
+            "job_id": job_id,
+            "status_url": f"/members/{member.user_id}/card/status?job_id={job_id}",
+            "download_url": f"/members/{member.user_id}/card/download?job_id={job_id}"
+        }), 202
+
+    except OperationalError as e:
+        print(f"Card Queue DB Operational Error: {e}")
+        return jsonify({"error": "Database is unavailable. Cannot queue card generation."}), 500
+
+    except Exception as e:
+        print(f"Card Queue Error: {e}")
+        return jsonify({"error": f"Internal Server Error: {str(e)}"}), 500
+
+@app.route('/members/<string:user_id>/card/status', methods=['GET'])
+def member_card_status(user_id):
+    """Reports whether a queued card is ready, still rendering, or failed."""
+    job_id = request.args.get('job_id', '')
+    if card_file_path(job_id) is None:
+        return jsonify({"error": "Invalid job_id."}), 400
+
+    try:
+        path = current_card_job_path(user_id, job_id)
+    except OperationalError as e:
+        print(f"Card Status DB Operational Error: {e}")
+        return jsonify({"error": "Database is unavailable. Cannot check card status."}), 500
+    if path is None:
+        return jsonify({"error": "No card job with this id for this member. Queue the card again."}), 404
+
+    if os.path.exists(path):
+        status = "ready"
+    elif os.path.exists(f"{path}.error"):
+        status = "failed"
+    elif card_job_pending(path):
+        status = "pending"
+    elif os.path.exists(f"{path}.pending"):
+        status = "failed" # Lost with a restarted worker; queueing again starts a new render
+    else:
+        return jsonify({"error": "No card job with this id for this member. Queue the card again."}), 404
+    return jsonify({"job_id": job_id, "status": status})
+
+@app.route('/members/<string:user_id>/card/download', methods=['GET'])
+def download_member_card(user_id):
+    """Sends a card rendered by a background job."""
+    job_id = request.args.get('job_id', '')
+    if card_file_path(job_id) is None:
+        return jsonify({"error": "Invalid job_id."}), 400
+
+    try:
+        path = current_card_job_path(user_id, job_id)
+    except OperationalError as e:
+        print(f"Card Download DB Operational Error: {e}")
+        return jsonify({"error": "Database is unavailable. Cannot send card."}), 500
+    if path is None:
+        return jsonify({"error": "No card job with this id for this member. Queue the card again."}), 404
+
+    try:
+        os.utime(path) # Recently used, so the cache sweep keeps it
+    except FileNotFoundError:
+        return jsonify({"error": "Card is not ready yet. Check the status URL."}), 404
+
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=f"PCT_ID_Card_{secure_filename(user_id)}.pdf",
+        mimetype='application/pdf',
+        etag=job_id,
+        conditional=True,
+        max_age=300
+    )
 
 # --- FEATURE SEC-401: REAL-TIME VERIFICATION PORTAL ENDPOINT ---
+def load_verification(user_id):
+    """Looks up the fields shown on the verification portal, returning a dict or None."""
+    # Only the four displayed columns, as a plain row rather than a full CampaignMember
+    row = Session().execute(VERIFICATION_BY_USER_ID, {"user_id": user_id}).mappings().first()
+    return dict(row) if row else None
+
 @app.route('/verify/<string:user_id>', methods=['GET'])
 def verify_member(user_id):
     """Provides public verification data for QR code scanning (SEC-401)."""
-    session = Session()
     try:
-        member = session.query(CampaignMember).filter_by(user_id=user_id).first()
+        # Repeat scans of the same card within a minute are served from the cache
+        member = cached_lookup(VERIFY_CACHE, user_id, lambda: load_verification(user_id))
 
         if not member:
             return jsonify({"error": "ID not found in system."}, 404)
         
-        # Check expiry status
-        is_active = member.status == 'Active' and member.membership_end >= date.today()
+        # Check expiry status (evaluated per request so a cached entry never outlives the expiry date)
+        is_active = member["status"] == 'Active' and member["membership_end"] >= date.today()
         
         return jsonify({
-            "User_ID": member.user_id,
-            "Name": member.name,
-            "Status": member.status,
-            "Valid_Until": member.membership_end.isoformat(),
+            "User_ID": member["user_id"],
+            "Name": member["name"],
+            "Status": member["status"],
+            "Valid_Until": member["membership_end"],
             "Verification_Result": "AUTHENTICATED" if is_active else "EXPIRED/INACTIVE"
         })
 
@@ -512,9 +1322,6 @@ def verify_member(user_id):
     except Exception as e:
         print(f"Verification Error: {e}")
         return jsonify({"error": f"Internal Server Error during verification: {str(e)}"}, 500)
-    
-    finally:
-        session.close()
 
 
 # --- EXECUTION BLOCK ---